@@ -1,10 +1,7 @@
 #Imports
 from datetime import datetime
 from airflow.models.dag import DAG
-from airflow.operators.bash import BashOperator
-
-AIRFLOW_HOME = "/usr/local/airflow"
-SCRIPT_PATH = f"{AIRFLOW_HOME}/include/scripts"
+from airflow.sdk import task
 
 # --- 1. Define the DAG ---
 with DAG(
@@ -16,16 +13,21 @@ with DAG(
     tags=["movies", "etl", "roi", "business-project"],
 ) as dag:
     # --- 2. Define the Tasks ---
+    # Both steps run in the worker's Python process, and the raw movie
+    # records are handed from extract to transform through XCom
+    # (pickled by include.xcom.PickleBackend) instead of a JSON file.
+    # The scripts are imported inside the tasks, so parsing this DAG file
+    # doesn't load pandas, httpx or s3fs.
 
-    task_extract = BashOperator(
-        task_id="extract_raw_data",
-        bash_command=f"python {SCRIPT_PATH}/extract.py",
-    )
+    @task(task_id="extract_raw_data")
+    def extract() -> list[dict]:
+        from include.scripts.extract import run_extraction
+        return run_extraction()
 
-    task_transform = BashOperator(
-        task_id="transform_clean_data",
-        bash_command=f"python {SCRIPT_PATH}/transform.py",
-    )
+    @task(task_id="transform_clean_data")
+    def transform(raw: list[dict]):
+        from include.scripts.transform import run_transformation
+        run_transformation(raw)
 
     # --- 3. Set the Task Dependencies ---
-    task_extract >> task_transform
+    transform(extract())
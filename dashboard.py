@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-import boto3
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow.parquet as pq
+import requests
+import s3fs
+import time
 
 # --- Configuration ---
 st.set_page_config(layout="wide", page_title="Movie ROI Dashboard")
@@ -11,45 +14,128 @@ st.set_page_config(layout="wide", page_title="Movie ROI Dashboard")
 AWS_ACCESS_KEY_ID = st.secrets.get("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = st.secrets.get("AWS_SECRET_ACCESS_KEY")
 AWS_S3_BUCKET = st.secrets.get("AWS_S3_BUCKET")
-S3_FILE_KEY = "processed_movies.csv"
+S3_FILE_KEY = "processed_movies.parquet"
 
-@st.cache_data(ttl=3600) # Cache the data for 1 hour
-def load_data_from_s3():
+# Only the columns the dashboard actually displays
+COLS = [
+    'title', 'ROI', 'revenue', 'budget', 'genres', 'release_date', 'overview', 'poster_url',
+    'actor_1_name', 'actor_1_image_url',
+    'actor_2_name', 'actor_2_image_url',
+    'actor_3_name', 'actor_3_image_url'
+]
+
+@st.cache_resource(ttl=3600) # Cache the data for 1 hour (shared, not re-hashed on every rerun)
+def _load_data_from_s3():
     """
-    Connects to S3 using boto3 and st.secrets, then loads the CSV
+    Connects to S3 using s3fs and st.secrets, then loads the Parquet
     file into a Pandas DataFrame.
+    Returns the DataFrame and the time it was loaded at, which identifies
+    this load for the derived caches below.
     """
     if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_S3_BUCKET]):
         st.error("AWS credentials or bucket name not found in Streamlit Secrets.")
-        return None
+        return None, None
 
     try:
         # Connect to S3
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+        fs = s3fs.S3FileSystem(key=AWS_ACCESS_KEY_ID, secret=AWS_SECRET_ACCESS_KEY)
+
+        # Read the Parquet file straight from S3 with PyArrow's multithreaded reader.
+        # Only the byte ranges of the selected columns are fetched, instead of
+        # downloading the whole object into memory first.
+        # (column types, including the release_date datetime, are stored in the file)
+        table = pq.read_table(
+            f"{AWS_S3_BUCKET}/{S3_FILE_KEY}", columns=COLS, filesystem=fs, use_threads=True
         )
-        
-        # Get the object from S3
-        response = s3_client.get_object(Bucket=AWS_S3_BUCKET, Key=S3_FILE_KEY)
-        
-        # Read the object's body into a string
-        csv_string = response.get("Body").read().decode('utf-8')
-        
-        # Read the string into a Pandas DataFrame
-        df = pd.read_csv(StringIO(csv_string))
-        
-        # Convert release_date to datetime objects for better handling
-        df['release_date'] = pd.to_datetime(df['release_date'])
-        return df
+
+        # Hand the columns over to pandas, freeing the Arrow buffers as we go
+        df = table.to_pandas(self_destruct=True, split_blocks=True)
+        del table
+        return df, time.time()
         
     except Exception as e:
         st.error(f"Error loading data from S3: {e}")
+        return None, None
+
+def load_data_from_s3():
+    """
+    Returns a copy of the cached DataFrame, so the shared cached
+    object is never modified by the dashboard, and its load time.
+    """
+    df, loaded_at = _load_data_from_s3()
+    return (df.copy() if df is not None else None), loaded_at
+
+@st.cache_data(ttl=3600) # Keyed on the load time only (the "_df" argument isn't hashed)
+def compute_views(loaded_at, _df):
+    """
+    Computes the top films, KPIs and rankings table once per loaded
+    dataset, instead of on every widget interaction.
+    """
+    # Top performers: only a single row is needed, so no full sort
+    best_roi_idx = _df['ROI'].idxmax()
+    highest_gross_idx = _df['revenue'].idxmax()
+
+    # Full rankings table: the only place that needs a sorted frame, so it's sorted once here
+    rankings = _df[['title', 'ROI']].sort_values("ROI", ascending=False)
+    # Format the ROI column to look like a percentage
+    rankings['ROI'] = rankings['ROI'].map('{:,.1%}'.format)
+
+    return {
+        'top_5_roi': _df.nlargest(5, 'ROI'),
+        'best_roi_title': str(_df.at[best_roi_idx, 'title']),
+        'best_roi': float(_df.at[best_roi_idx, 'ROI']),
+        'highest_gross_title': str(_df.at[highest_gross_idx, 'title']),
+        'highest_gross_revenue': int(_df.at[highest_gross_idx, 'revenue']),
+        'average_roi': float(_df['ROI'].mean()),
+        'rankings': rankings,
+    }
+
+@st.cache_data(ttl=3600) # Keyed on the load time only (the "_df" argument isn't hashed)
+def compute_genre_roi(loaded_at, _df):
+    """
+    Computes the mean ROI of each individual genre once per loaded dataset.
+    Returns a small Series (one value per genre), sorted by ROI.
+    """
+    return (
+        _df.assign(genre=_df['genres'].str.split(', '))
+        .explode('genre')
+        .groupby('genre', sort=False)['ROI'].mean()
+        .sort_values(ascending=False)
+    )
+
+IMAGE_TIMEOUT = 2 # Seconds before an image download is abandoned
+IMAGE_WORKERS = 8 # Images downloaded at the same time
+
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False) # Cache images for 1 day
+def fetch_image(url):
+    """
+    Downloads a poster or profile image once, so reruns don't fetch it again.
+    Failed downloads raise, and exceptions are never cached.
+    """
+    response = requests.get(url, timeout=IMAGE_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+@st.cache_data(ttl=300, show_spinner=False) # Remember failed downloads for 5 minutes
+def fetch_image_or_none(url):
+    """Returns the downloaded image, or None if the download fails."""
+    try:
+        return fetch_image(url)
+    except requests.exceptions.RequestException:
         return None
 
+def load_images(urls):
+    """
+    Downloads the given images in parallel. Maps each URL to its image, or to
+    the URL itself (loaded by the browser) if the download failed.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url and pd.notnull(url)))
+    with ThreadPoolExecutor(max_workers=IMAGE_WORKERS) as pool:
+        images = pool.map(fetch_image_or_none, urls)
+    return {url: image if image is not None else url for url, image in zip(urls, images)}
+
 # Load the data
-df = load_data_from_s3()
+df, loaded_at = load_data_from_s3()
 
 # --- Build the Dashboard ---
 if df is not None and not df.empty:
@@ -58,14 +144,12 @@ if df is not None and not df.empty:
     st.title("Movie ROI & Talent Dashboard 🎬")
     st.markdown("Business insights from the top-grossing films of the last 90 days.")
 
-    # Sort data for KPIs
-    df_sorted_roi = df.sort_values("ROI", ascending=False)
-    df_sorted_revenue = df.sort_values("revenue", ascending=False)
-
-    # Get the top performers
-    best_roi_movie = df_sorted_roi.iloc[0]
-    highest_gross_movie = df_sorted_revenue.iloc[0]
-    average_roi = df['ROI'].mean()
+    # Sorted data and KPIs (computed once per dataset, then served from cache)
+    views = compute_views(loaded_at, df)
+    # Get the top performers (plain Python scalars)
+    best_roi = views['best_roi']
+    highest_gross_revenue = views['highest_gross_revenue']
+    average_roi = views['average_roi']
 
     st.divider()
 
@@ -73,15 +157,15 @@ if df is not None and not df.empty:
     kpi_cols = st.columns(3)
     kpi_cols[0].metric(
         label="🏆 Best ROI",
-        value=best_roi_movie['title'],
-        help=f"This film had an ROI of {best_roi_movie['ROI']:.1%}",
-        delta=f"{best_roi_movie['ROI']:.1%}",
+        value=views['best_roi_title'],
+        help=f"This film had an ROI of {best_roi:.1%}",
+        delta=f"{best_roi:.1%}",
     )
     kpi_cols[1].metric(
         label="💰 Highest Gross Revenue",
-        value=highest_gross_movie['title'],
-        help=f"This film grossed ${highest_gross_movie['revenue']:,}",
-        delta=f"${highest_gross_movie['revenue'] / 1_000_000:.1f} M",
+        value=views['highest_gross_title'],
+        help=f"This film grossed ${highest_gross_revenue:,}",
+        delta=f"${highest_gross_revenue / 1_000_000:.1f} M",
     )
     kpi_cols[2].metric(
         label="📊 Average ROI",
@@ -110,11 +194,8 @@ if df is not None and not df.empty:
         st.subheader("Which Genres Are Most Profitable?")
         
         try:
-            df_genres = df.assign(genre=df['genres'].str.split(', ')).explode('genre')
-            # Calculate mean ROI for each genre
-            df_genre_roi = df_genres.groupby('genre')['ROI'].mean().sort_values(ascending=False)
-            
-            st.bar_chart(df_genre_roi)
+            # Mean ROI for each genre (computed once per dataset)
+            st.bar_chart(compute_genre_roi(loaded_at, df))
             st.caption("Average ROI for each individual genre.")
         except Exception as e:
             st.warning(f"Could not generate genre chart: {e}")
@@ -125,53 +206,65 @@ if df is not None and not df.empty:
     st.header("Top 5 Most Profitable Films (by ROI)")
 
     # Get top 5 movies by ROI
-    top_5_roi = df_sorted_roi.head(5)
+    top_5_roi = views['top_5_roi']
 
-    for i, row in top_5_roi.iterrows():
-        st.subheader(f"{(df_sorted_roi.index.get_loc(i))+1}. {row['title']}")
+    # Download all posters and actor pictures of the top 5 together
+    top_5_images = load_images(
+        top_5_roi[['poster_url', 'actor_1_image_url', 'actor_2_image_url', 'actor_3_image_url']]
+        .to_numpy().ravel()
+    )
+
+    for rank, row in enumerate(top_5_roi.itertuples(index=False), 1):
+        st.subheader(f"{rank}. {row.title}")
         
         # Use columns for a clean layout: [Poster | Details | Cast]
         detail_cols = st.columns([1, 2, 1])
         
         with detail_cols[0]:
-            if row['poster_url']:
-                st.image(row['poster_url'], caption="Poster", use_column_width="auto")
+            poster = top_5_images.get(row.poster_url)
+            if poster is not None:
+                st.image(poster, caption="Poster", use_column_width="auto")
 
         with detail_cols[1]:
-            st.markdown(f"**ROI: {row['ROI']:.1%}**")
-            st.markdown(f"**Budget:** ${row['budget']:,}")
-            st.markdown(f"**Revenue:** ${row['revenue']:,}")
-            st.markdown(f"**Genres:** {row['genres']}")
-            st.caption(f"**Overview:** {row['overview']}")
+            st.markdown(f"**ROI: {row.ROI:.1%}**")
+            st.markdown(f"**Budget:** ${row.budget:,}")
+            st.markdown(f"**Revenue:** ${row.revenue:,}")
+            st.markdown(f"**Genres:** {row.genres}")
+            st.caption(f"**Overview:** {row.overview}")
 
         with detail_cols[2]:
             st.markdown("**Top 3 Cast**")
             
-            if row['actor_1_name'] and pd.notnull(row['actor_1_image_url']):
-                st.image(row['actor_1_image_url'], caption=row['actor_1_name'], use_container_width=True)
-            elif row['actor_1_name']:
-                st.caption(row['actor_1_name'] + " (No image)")
-                
-            if row['actor_2_name'] and pd.notnull(row['actor_2_image_url']):
-                st.image(row['actor_2_image_url'], caption=row['actor_2_name'], use_container_width=True)
-            elif row['actor_2_name']:
-                st.caption(row['actor_2_name'] + " (No image)")
-
-            if row['actor_3_name'] and pd.notnull(row['actor_3_image_url']):
-                st.image(row['actor_3_image_url'], caption=row['actor_3_name'], use_container_width=True)
-            elif row['actor_3_name']:
-                st.caption(row['actor_3_name'] + " (No image)")
+            actors = [
+                (row.actor_1_name, row.actor_1_image_url),
+                (row.actor_2_name, row.actor_2_image_url),
+                (row.actor_3_name, row.actor_3_image_url),
+            ]
+
+            # Render all actor pictures with a single st.image call
+            images, captions, no_image = [], [], []
+            for name, image_url in actors:
+                if not name:
+                    continue
+                image = top_5_images.get(image_url)
+                if image is not None:
+                    images.append(image)
+                    captions.append(name)
+                else:
+                    no_image.append(name)
+
+            if images:
+                st.image(images, caption=captions, width=100)
+            for name in no_image:
+                st.caption(name + " (No image)")
             # --- END OF FIX ---
 
         st.divider()
 
     # --- 4. The "Raw Data" - Full Data Table ---
     with st.expander("Explore All Movie ROI Rankings"):
-        # Select, sort, and reset index
-        df_table = df[['title', 'ROI']].sort_values("ROI", ascending=False)
-        
-        # Format the ROI column to look like a percentage
-        df_table['ROI'] = df_table['ROI'].map('{:,.1%}'.format)
+        # Sorted and formatted once in compute_views
+        df_table = views['rankings']
         
         # Hide the index for a cleaner look
         st.dataframe(df_table, use_container_width=True, hide_index=True)
@@ -1,9 +1,10 @@
 #Imports 
 import os
-import requests
+import asyncio
+import httpx
+from aiolimiter import AsyncLimiter
 import datetime
-import json
-import time
+import orjson
 from pathlib import Path
 
 # --- Configuration & Setup ---
@@ -17,6 +18,17 @@ DISCOVER_URL = f"{BASE_API_URL}/discover/movie" # To get trending movies
 DETAILS_URL_TEMPLATE = f"{BASE_API_URL}/movie/{{movie_id}}" #to get IDs
 CREDITS_URL_TEMPLATE = f"{BASE_API_URL}/movie/{{movie_id}}/credits" # To get actors
 
+# Concurrency settings
+MAX_CONCURRENT_MOVIES = 10 # How many movies are fetched at the same time
+RATE_LIMIT_REQUESTS = 40 # TMDB allows 40 requests...
+RATE_LIMIT_PERIOD = 10 # ...every 10 seconds
+
+# Retry settings
+REQUEST_TIMEOUT = 10 # Seconds before a request is abandoned
+MAX_RETRIES = 3 # Retries for rate-limited (429) or failed (5xx) requests
+BACKOFF_FACTOR = 0.3 # Waits 0.3s, 0.6s, 1.2s between retries
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 # Define file paths for saving data
 RAW_DATA_PATH = Path("/usr/local/airflow/data/raw")
 OUTPUT_FILE = RAW_DATA_PATH / "raw_movies.json"
@@ -26,8 +38,37 @@ def validate_api_key():
     if not API_KEY:
         print("Error: TMDB_API_KEY environment variable not set.")
         raise ValueError("TMDB_API_KEY environment variable not set.")
+
+def get_retry_delay(response, attempt):
+    """
+    Returns how long to wait before retrying: TMDB's Retry-After header
+    (in seconds) when present, otherwise exponential backoff.
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass # Not a number of seconds (e.g. an HTTP date), fall back to backoff
+
+    return BACKOFF_FACTOR * (2 ** attempt)
+
+async def get_with_retries(client, limiter, url, params):
+    """
+    Sends a GET request through the rate limiter, retrying when TMDB answers
+    with a rate-limit or server error.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        # To Respect API rate limits
+        async with limiter:
+            response = await client.get(url, params=params)
+
+        if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+            return response
+
+        await asyncio.sleep(get_retry_delay(response, attempt))
     
-def fetch_movie_ids():
+async def fetch_movie_ids(client, limiter):
     """
     Step 1: Fetches the IDs of top-grossing movies from the last 90 days.
     """
@@ -47,21 +88,21 @@ def fetch_movie_ids():
 
     print(f"Fetching movie list released between {ninety_days_ago.isoformat()} and {today.isoformat()}...")
     try:
-        response = requests.get(DISCOVER_URL, params=discover_params)
+        response = await get_with_retries(client, limiter, DISCOVER_URL, discover_params)
         response.raise_for_status() # Check for HTTP errors
         discover_data = response.json()
         
         movie_ids = [movie['id'] for movie in discover_data.get('results', [])]
         return movie_ids
         
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e: # ValueError: body isn't valid JSON
         print(f"Error fetching movie list from TMDB: {e}")
         return []
     
-def fetch_data_for_movie(movie_id):
+async def fetch_data_for_movie(client, limiter, movie_id):
     """
     Step 2: Fetches both Details (budget, revenue) and Credits (actors)
-    for a single movie ID.
+    for a single movie ID. Both requests are sent at the same time.
     """
     details_params = {"api_key": API_KEY, "language": "en-US"}
     credits_params = {"api_key": API_KEY}
@@ -70,14 +111,14 @@ def fetch_data_for_movie(movie_id):
     credits_url = CREDITS_URL_TEMPLATE.format(movie_id=movie_id)
 
     try:
-        # Fetch Details
-        details_response = requests.get(details_url, params=details_params)
+        # Fetch Details and Credits concurrently
+        details_response, credits_response = await asyncio.gather(
+            get_with_retries(client, limiter, details_url, details_params),
+            get_with_retries(client, limiter, credits_url, credits_params),
+        )
         details_response.raise_for_status()
-        details_data = details_response.json()
-        
-        # Fetch Credits
-        credits_response = requests.get(credits_url, params=credits_params)
         credits_response.raise_for_status()
+        details_data = details_response.json()
         credits_data = credits_response.json()
         
         # Merge the two JSON objects into one
@@ -86,36 +127,60 @@ def fetch_data_for_movie(movie_id):
         
         return details_data
         
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e: # ValueError: body isn't valid JSON
         print(f"Error fetching data for movie ID {movie_id}: {e}")
         return None
+
+async def fetch_all_movies(transport=None):
+    """
+    Fetches the movie list, then the details of every movie concurrently,
+    sharing a single HTTP/2 client (and its connections) for all requests.
+    A custom httpx transport can be passed in (e.g. a MockTransport in tests).
+    """
+    limiter = AsyncLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_MOVIES)
+
+    if transport is None:
+        # The transport also retries failed connection attempts
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            retries=MAX_RETRIES,
+        )
+
+    async with httpx.AsyncClient(transport=transport, timeout=REQUEST_TIMEOUT) as client:
+        # Get all movie IDs
+        movie_ids = await fetch_movie_ids(client, limiter)
+
+        async def fetch_with_semaphore(movie_id):
+            async with semaphore:
+                return await fetch_data_for_movie(client, limiter, movie_id)
+
+        results = await asyncio.gather(*(fetch_with_semaphore(movie_id) for movie_id in movie_ids))
+
+    return [movie_data for movie_data in results if movie_data]
     
 def run_extraction():
-
+    """
+    Fetches the full data of every movie and returns it as a list of dicts,
+    ready to be handed over to the transformation step.
+    """
     validate_api_key()
     
-    # Get all movie IDs
-    movie_ids = fetch_movie_ids()
-    
-    all_movie_data = []
-    for i, movie_id in enumerate(movie_ids):
-        movie_data = fetch_data_for_movie(movie_id)
-        if movie_data:
-            all_movie_data.append(movie_data)
-        # To Respect API rate limits
-        time.sleep(0.3) 
+    all_movie_data = asyncio.run(fetch_all_movies())
 
     if not all_movie_data:
         print("No detailed movie data was fetched.")
-        return
+        return []
 
     print(f"Successfully fetched full data for {len(all_movie_data)} movies.")
-    
-    # Step 3: Save the data to a file
+    return all_movie_data
+
+def save_raw_data(all_movie_data):
+    """Step 3: Saves the raw movie data to a file (used when running the script directly)."""
     RAW_DATA_PATH.mkdir(parents=True, exist_ok=True)
     
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(all_movie_data, f, indent=4)
+    OUTPUT_FILE.write_bytes(orjson.dumps(all_movie_data))
         
     print(f"Data successfully saved to {OUTPUT_FILE}")
 
@@ -126,6 +191,8 @@ if __name__ == "__main__":
     (e.g., 'python include/scripts/extract.py')
     """
     print("--- Testing extraction script ---")
-    run_extraction()
+    all_movie_data = run_extraction()
+    if all_movie_data:
+        save_raw_data(all_movie_data)
     print("--- End of test ---")
 
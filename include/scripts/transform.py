@@ -1,8 +1,9 @@
 import pandas as pd
-import json
+import heapq
+from operator import itemgetter
+import orjson
 from pathlib import Path
-import boto3
-from io import StringIO
+import s3fs
 import os  
 
 # --- Configuration ---
@@ -11,7 +12,8 @@ import os
 AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
 AWS_S3_BUCKET = os.environ.get("AWS_S3_BUCKET")
-S3_FILE_KEY = "processed_movies.csv" # The name of the file in S3
+S3_FILE_KEY = "processed_movies.parquet" # The name of the file in S3
+S3_BLOCK_SIZE = 8 * 1024 * 1024 # Upload in 8 MiB multipart chunks
 
 # Define file paths
 # /usr/local/airflow/ is the working directory inside the Astro container
@@ -22,35 +24,34 @@ RAW_FILE_PATH = BASE_DATA_PATH / "raw" / "raw_movies.json"
 POSTER_BASE_URL = "https://image.tmdb.org/t/p/w342"
 PROFILE_BASE_URL = "https://image.tmdb.org/t/p/w185"
 
+# Keep only the columns we need for the dashboard
+COLS_TO_KEEP = [
+    'id', 'title', 'budget', 'revenue', 'release_date', 'vote_average',
+    'overview', 'poster_path', 'genres', 'cast'
+]
+
+def records_to_dataframe(records):
+    """Builds a DataFrame holding only the columns we keep from the raw records."""
+    return pd.DataFrame.from_records(records, columns=COLS_TO_KEEP)
+
 def load_data(file_path):
     """Loads the raw JSON data from the file."""
     print(f"Loading raw data from {file_path}...")
-    with open(file_path, 'r') as f:
-        data = json.load(f)
+    data = orjson.loads(Path(file_path).read_bytes())
     print(f"Successfully loaded {len(data)} records.")
-    return pd.DataFrame(data)
+    return records_to_dataframe(data)
 
 def clean_and_filter(df):
     """Cleans data, filters for valid entries, and calculates ROI."""
     print("Cleaning and filtering data...")
     
-    # Keep only the columns we need for the dashboard
-    cols_to_keep = [
-        'id', 'title', 'budget', 'revenue', 'release_date', 'vote_average',
-        'overview', 'poster_path', 'genres', 'cast'
-    ]
-    
-    # Ensure all columns exist to prevent errors
-    for col in cols_to_keep:
-        if col not in df.columns:
-            df[col] = None
-            
-    df = df[cols_to_keep]
+    # Keep our columns, ensuring they all exist to prevent errors
+    df = df.reindex(columns=COLS_TO_KEEP)
 
     # Filter for movies that are "analyzable" for ROI
     # We can't use movies where budget or revenue is 0
     initial_count = len(df)
-    df = df[(df['budget'] > 0) & (df['revenue'] > 0)].copy() 
+    df = df.query('budget > 0 and revenue > 0').copy()
     print(f"Filtered {initial_count - len(df)} movies. {len(df)} analyzable movies remaining.")
 
     if df.empty:
@@ -60,63 +61,48 @@ def clean_and_filter(df):
     # Create our key business metric: ROI
     # Formula: (Revenue - Budget) / Budget
     df['ROI'] = (df['revenue'] - df['budget']) / df['budget']
-    
-    return df
 
-def extract_top_actors(cast_list):
-    """
-    Helper function to extract top 3 actors from the 'cast' list
-    and return them as a flat Series.
-    """
-    actor_data = {
-        'actor_1_name': None, 'actor_1_image_url': None,
-        'actor_2_name': None, 'actor_2_image_url': None,
-        'actor_3_name': None, 'actor_3_image_url': None
-    }
+    # Convert release_date to datetime, so it is stored typed in the Parquet file
+    df['release_date'] = pd.to_datetime(df['release_date'], format='%Y-%m-%d', errors='coerce')
     
-    if not isinstance(cast_list, list):
-        return pd.Series(actor_data)
-
-    # Sort cast by 'order' (their rank in the credits), filtering out any without 'order'
-    sorted_cast = sorted([c for c in cast_list if 'order' in c], key=lambda x: x['order'])
-
-    # Get top 3
-    if len(sorted_cast) > 0:
-        actor_data['actor_1_name'] = sorted_cast[0].get('name')
-        if sorted_cast[0].get('profile_path'):
-            actor_data['actor_1_image_url'] = f"{PROFILE_BASE_URL}{sorted_cast[0]['profile_path']}"
-            
-    if len(sorted_cast) > 1:
-        actor_data['actor_2_name'] = sorted_cast[1].get('name')
-        if sorted_cast[1].get('profile_path'):
-            actor_data['actor_2_image_url'] = f"{PROFILE_BASE_URL}{sorted_cast[1]['profile_path']}"
-            
-    if len(sorted_cast) > 2:
-        actor_data['actor_3_name'] = sorted_cast[2].get('name')
-        if sorted_cast[2].get('profile_path'):
-            actor_data['actor_3_image_url'] = f"{PROFILE_BASE_URL}{sorted_cast[2]['profile_path']}"
-            
-    return pd.Series(actor_data)
+    return df
 
 def enhance_and_flatten(df):
     """Creates full URLs, flattens genres, and flattens cast lists."""
     print("Enhancing data (URLs, genres, actors)...")
 
-    # 1. Create full poster URL
-    df['poster_url'] = df['poster_path'].apply(
-        lambda x: f"{POSTER_BASE_URL}{x}" if x else None
-    )
+    # 1. Create full poster URL (only for movies that have a poster)
+    # (cast to object: the column is all-NaN floats when no record has a poster_path)
+    poster_path = df['poster_path'].astype(object)
+    has_poster = poster_path.notna() & (poster_path != '')
+    df['poster_url'] = None
+    df.loc[has_poster, 'poster_url'] = POSTER_BASE_URL + poster_path[has_poster]
 
     # 2. Flatten genres list (e.g., [{'name': 'Action'}] -> "Action")
-    df['genres'] = df['genres'].apply(
-        lambda x: ', '.join([g['name'] for g in x]) if isinstance(x, list) and x else None
-    )
-    
-    # 3. Flatten cast list
-    actor_df = df['cast'].apply(extract_top_actors)
+    genre_names = df['genres'].explode().dropna().map(itemgetter('name'))
+    df['genres'] = genre_names.groupby(level=0).agg(', '.join).reindex(df.index)
     
-    # We now join this new actor DataFrame back to our main DataFrame
-    df = pd.concat([df, actor_df], axis=1)
+    # 3. Flatten cast list into one column per actor name / image
+    # A single pass fills plain lists (one per output column) instead of
+    # building a Series for every row.
+    names = [[None] * len(df) for _ in range(3)]
+    images = [[None] * len(df) for _ in range(3)]
+
+    for i, cast_list in enumerate(df['cast'].to_numpy()):
+        if not isinstance(cast_list, list):
+            continue
+
+        # Top 3 cast by 'order' (their rank in the credits), skipping any without 'order'
+        top_cast = heapq.nsmallest(3, (c for c in cast_list if 'order' in c), key=itemgetter('order'))
+
+        for j, actor in enumerate(top_cast):
+            names[j][i] = actor.get('name')
+            if actor.get('profile_path'):
+                images[j][i] = f"{PROFILE_BASE_URL}{actor['profile_path']}"
+
+    for j in range(3):
+        df[f'actor_{j + 1}_name'] = names[j]
+        df[f'actor_{j + 1}_image_url'] = images[j]
     
     return df
 
@@ -130,7 +116,7 @@ def save_to_s3(df):
         print("Error: AWS credentials or bucket name not set. Cannot upload to S3.")
         return
 
-    # Define the final column order for the CSV
+    # Define the final column order for the Parquet file
     final_columns = [
         'id', 'title', 'budget', 'revenue', 'release_date', 'vote_average', 'overview',
         'poster_url', 'genres', 'ROI',
@@ -145,31 +131,33 @@ def save_to_s3(df):
     # Reorder columns and ensure they all exist
     df = df.reindex(columns=final_columns)
     
-    # Create an in-memory CSV file
-    csv_buffer = StringIO()
-    df.to_csv(csv_buffer, index=False)
-    
-    # Connect to S3 using boto3
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    # Connect to S3 using s3fs
+    fs = s3fs.S3FileSystem(
+        key=AWS_ACCESS_KEY_ID,
+        secret=AWS_SECRET_ACCESS_KEY,
+        default_block_size=S3_BLOCK_SIZE
     )
     
-    # Upload the CSV buffer
+    # Write the Parquet file straight to S3
+    # s3fs uploads it in chunks (multipart), so the whole file is never held in memory
     try:
-        s3_client.put_object(
-            Bucket=AWS_S3_BUCKET,
-            Key=S3_FILE_KEY,
-            Body=csv_buffer.getvalue()
-        )
+        with fs.open(f"{AWS_S3_BUCKET}/{S3_FILE_KEY}", 'wb') as f:
+            df.to_parquet(f, engine='pyarrow', compression='zstd', index=False)
         print(f"Transformation Complete!")
     except Exception as e:
         print(f"Error uploading to S3: {e}")
 
-def run_transformation():
-    """Main orchestration function for the transformation script."""
-    df = load_data(RAW_FILE_PATH)
+def run_transformation(raw_movies=None):
+    """
+    Main orchestration function for the transformation script.
+    Uses the in-memory records from the extraction step when given,
+    otherwise falls back to the raw JSON file.
+    """
+    if raw_movies is not None:
+        print(f"Received {len(raw_movies)} records from the extraction step.")
+        df = records_to_dataframe(raw_movies)
+    else:
+        df = load_data(RAW_FILE_PATH)
     
     if df is not None:
         df_cleaned = clean_and_filter(df)
@@ -0,0 +1,121 @@
+"""Tests for the concurrent TMDB fetching in include/scripts/extract.py."""
+
+import asyncio
+import httpx
+from aiolimiter import AsyncLimiter
+from include.scripts import extract
+from include.scripts.extract import MAX_RETRIES, fetch_all_movies, get_retry_delay, get_with_retries
+
+
+def make_transport(movies, failing_ids=(), malformed_ids=()):
+    """
+    Builds a MockTransport answering TMDB's discover, details and credits
+    endpoints for the given {movie_id: title} mapping.
+    """
+    def handler(request):
+        parts = request.url.path.strip("/").split("/")  # e.g. ['3', 'movie', '1', 'credits']
+
+        if parts[1] == "discover":
+            return httpx.Response(200, json={"results": [{"id": movie_id} for movie_id in movies]})
+
+        movie_id = int(parts[2])
+        if movie_id in failing_ids:
+            return httpx.Response(404, json={"status_message": "Not found"})
+        if movie_id in malformed_ids:
+            return httpx.Response(200, text="<html>Bad Gateway</html>")
+
+        if len(parts) == 4:  # /movie/{id}/credits
+            return httpx.Response(200, json={"id": movie_id, "cast": [{"name": f"Actor {movie_id}", "order": 0}]})
+        return httpx.Response(200, json={"id": movie_id, "title": movies[movie_id], "budget": 100})
+
+    return httpx.MockTransport(handler)
+
+
+def test_details_and_credits_are_merged_per_movie():
+    transport = make_transport({1: "One", 2: "Two"})
+
+    result = asyncio.run(fetch_all_movies(transport=transport))
+
+    assert sorted(result, key=lambda movie: movie["id"]) == [
+        {"id": 1, "title": "One", "budget": 100, "cast": [{"name": "Actor 1", "order": 0}]},
+        {"id": 2, "title": "Two", "budget": 100, "cast": [{"name": "Actor 2", "order": 0}]},
+    ]
+
+
+def test_failed_movie_is_dropped():
+    transport = make_transport({1: "One", 2: "Two", 3: "Three"}, failing_ids={2})
+
+    result = asyncio.run(fetch_all_movies(transport=transport))
+
+    assert sorted(movie["id"] for movie in result) == [1, 3]
+
+
+def test_movie_with_malformed_body_is_dropped():
+    transport = make_transport({1: "One", 2: "Two"}, malformed_ids={1})
+
+    result = asyncio.run(fetch_all_movies(transport=transport))
+
+    assert [movie["id"] for movie in result] == [2]
+
+
+def test_empty_discover_result_returns_empty_list():
+    transport = make_transport({})
+
+    assert asyncio.run(fetch_all_movies(transport=transport)) == []
+
+
+def get_with_responses(statuses, headers=None):
+    """
+    Calls get_with_retries against a transport answering with the given status
+    codes in turn. Returns the final response and the number of attempts made.
+    """
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        return httpx.Response(statuses[min(len(attempts), len(statuses)) - 1], headers=headers)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await get_with_retries(client, AsyncLimiter(100, 1), "https://api.test/movie/1", {})
+
+    return asyncio.run(run()), len(attempts)
+
+
+def test_rate_limited_request_is_retried(monkeypatch):
+    monkeypatch.setattr(extract, "BACKOFF_FACTOR", 0)
+
+    response, attempts = get_with_responses([429, 200])
+
+    assert response.status_code == 200
+    assert attempts == 2
+
+
+def test_retries_stop_after_max_retries(monkeypatch):
+    monkeypatch.setattr(extract, "BACKOFF_FACTOR", 0)
+
+    response, attempts = get_with_responses([503])
+
+    assert response.status_code == 503
+    assert attempts == MAX_RETRIES + 1
+
+
+def test_retry_after_header_is_honoured(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(extract.asyncio, "sleep", fake_sleep)
+
+    response, attempts = get_with_responses([429, 200], headers={"Retry-After": "2"})
+
+    assert response.status_code == 200
+    assert delays == [2.0]
+
+
+def test_retry_delay_falls_back_to_backoff():
+    response = httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+
+    assert get_retry_delay(response, 0) == extract.BACKOFF_FACTOR
+    assert get_retry_delay(httpx.Response(503), 2) == extract.BACKOFF_FACTOR * 4
@@ -0,0 +1,121 @@
+"""Tests for the pandas transformation steps in include/scripts/transform.py."""
+
+import pandas as pd
+import pytest
+from include.scripts.transform import (
+    POSTER_BASE_URL,
+    PROFILE_BASE_URL,
+    clean_and_filter,
+    enhance_and_flatten,
+    records_to_dataframe,
+)
+
+
+def run_pipeline(records):
+    """Runs the in-memory transformation steps on a list of raw movie records."""
+    df = clean_and_filter(records_to_dataframe(records))
+    return enhance_and_flatten(df).set_index("id")
+
+
+@pytest.fixture
+def records():
+    return [
+        {
+            "id": 1,
+            "title": "Full Cast",
+            "budget": 100,
+            "revenue": 300,
+            "release_date": "2025-01-02",
+            "poster_path": "/poster1.jpg",
+            "genres": [{"id": 28, "name": "Action"}, {"id": 12, "name": "Adventure"}],
+            "cast": [
+                {"name": "Fourth", "order": 3, "profile_path": "/p4.jpg"},
+                {"name": "No Order", "profile_path": "/p0.jpg"},
+                {"name": "Second", "order": 1, "profile_path": None},
+                {"name": "First", "order": 0, "profile_path": "/p1.jpg"},
+                {"name": "Third", "order": 2, "profile_path": "/p3.jpg"},
+            ],
+        },
+        {
+            "id": 2,
+            "title": "Small Cast",
+            "budget": 50,
+            "revenue": 25,
+            "release_date": "",
+            "poster_path": None,
+            "genres": [],
+            "cast": [
+                {"name": "Lead", "order": 0, "profile_path": "/lead.jpg"},
+                {"name": "Support", "order": 1, "profile_path": "/support.jpg"},
+            ],
+        },
+        {
+            "id": 3,
+            "title": "No Budget",
+            "budget": 0,
+            "revenue": 1000,
+            "release_date": "2025-02-03",
+            "poster_path": "/poster3.jpg",
+            "genres": [{"id": 18, "name": "Drama"}],
+            "cast": [],
+        },
+    ]
+
+
+def test_filters_unanalyzable_movies_and_computes_roi(records):
+    df = run_pipeline(records)
+
+    assert list(df.index) == [1, 2]
+    assert df.at[1, "ROI"] == pytest.approx(2.0)
+    assert df.at[2, "ROI"] == pytest.approx(-0.5)
+
+
+def test_release_date_is_parsed(records):
+    df = run_pipeline(records)
+
+    assert df.at[1, "release_date"] == pd.Timestamp("2025-01-02")
+    assert pd.isna(df.at[2, "release_date"])
+
+
+def test_poster_url_and_genres(records):
+    df = run_pipeline(records)
+
+    assert df.at[1, "poster_url"] == f"{POSTER_BASE_URL}/poster1.jpg"
+    assert pd.isna(df.at[2, "poster_url"])
+    assert df.at[1, "genres"] == "Action, Adventure"
+    assert pd.isna(df.at[2, "genres"])
+
+
+def test_top_actors_are_sorted_by_order(records):
+    df = run_pipeline(records)
+
+    assert df.at[1, "actor_1_name"] == "First"
+    assert df.at[1, "actor_1_image_url"] == f"{PROFILE_BASE_URL}/p1.jpg"
+    assert df.at[1, "actor_2_name"] == "Second"
+    assert pd.isna(df.at[1, "actor_2_image_url"])
+    assert df.at[1, "actor_3_name"] == "Third"
+    assert df.at[1, "actor_3_image_url"] == f"{PROFILE_BASE_URL}/p3.jpg"
+
+
+def test_fewer_than_three_actors(records):
+    df = run_pipeline(records)
+
+    assert df.at[2, "actor_1_name"] == "Lead"
+    assert df.at[2, "actor_2_name"] == "Support"
+    assert pd.isna(df.at[2, "actor_3_name"])
+    assert pd.isna(df.at[2, "actor_3_image_url"])
+
+
+def test_missing_poster_genres_and_cast_keys():
+    records = [
+        {"id": 1, "title": "Bare", "budget": 10, "revenue": 20, "release_date": "2025-03-04"},
+    ]
+
+    df = run_pipeline(records)
+
+    assert df.at[1, "ROI"] == pytest.approx(1.0)
+    assert pd.isna(df.at[1, "poster_url"])
+    assert pd.isna(df.at[1, "genres"])
+    for j in range(1, 4):
+        assert pd.isna(df.at[1, f"actor_{j}_name"])
+        assert pd.isna(df.at[1, f"actor_{j}_image_url"])